@@ -1,8 +1,25 @@
+import hashlib
+import io
+import json
 import os
 import sqlite3
+from typing import Iterator, Optional, Sequence
+
 import pandas as pd
 
 
+# -------------------------------------------------------------------------
+# Natural key of the BTS On_Time_Performance table
+# -------------------------------------------------------------------------
+ON_TIME_PRIMARY_KEY = ("year", "month", "carrier", "airport")
+
+# Table holding one resumable-load checkpoint per target table
+CHECKPOINT_TABLE = "_etl_checkpoint"
+
+# Bytes from the head and tail of the source file hashed into its fingerprint
+FINGERPRINT_BYTES = 1024 * 1024
+
+
 # -------------------------------------------------------------------------
 # File existence check
 # -------------------------------------------------------------------------
@@ -48,18 +65,109 @@ def clean_column_names(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+# -------------------------------------------------------------------------
+# Build a STRICT / WITHOUT ROWID table definition
+# -------------------------------------------------------------------------
+def _sqlite_type(dtype) -> str:
+    """Map a pandas dtype to a STRICT-compatible SQLite column type."""
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def build_strict_table_sql(
+    df: pd.DataFrame, table_name: str, primary_key: Sequence[str]
+) -> str:
+    """
+    Returns a CREATE TABLE statement for a STRICT, WITHOUT ROWID table
+    clustered on the given primary key columns.
+    Column types are taken from the DataFrame dtypes.
+    Raises KeyError if a primary key column is missing from the DataFrame.
+    """
+    missing = [col for col in primary_key if col not in df.columns]
+    if missing:
+        raise KeyError(f"Primary key columns not in DataFrame: {missing}")
+
+    columns = []
+    for col, dtype in df.dtypes.items():
+        definition = f'"{col}" {_sqlite_type(dtype)}'
+        if col in primary_key:
+            definition += " NOT NULL"
+        columns.append(definition)
+
+    key = ", ".join(f'"{col}"' for col in primary_key)
+    columns.append(f"PRIMARY KEY ({key})")
+
+    body = ",\n    ".join(columns)
+    return f'CREATE TABLE "{table_name}" (\n    {body}\n) STRICT, WITHOUT ROWID'
+
+
+# -------------------------------------------------------------------------
+# Insert DataFrame rows into an existing table
+# -------------------------------------------------------------------------
+def _insert_rows(conn: sqlite3.Connection, df: pd.DataFrame, table_name: str) -> None:
+    """
+    Inserts all rows of the DataFrame, converting NaN to NULL and datetime
+    columns to ISO 8601 strings (sqlite3 cannot bind pandas Timestamps).
+    """
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].map(lambda v: None if pd.isna(v) else v.isoformat())
+
+    columns = ", ".join(f'"{col}"' for col in df.columns)
+    placeholders = ", ".join("?" for _ in df.columns)
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    conn.executemany(
+        f'INSERT INTO "{table_name}" ({columns}) VALUES ({placeholders})', rows
+    )
+
+
 # -------------------------------------------------------------------------
 # Write a DataFrame to SQLite
 # -------------------------------------------------------------------------
-def write_to_sqlite(df: pd.DataFrame, sqlite_path: str, table_name: str) -> None:
+def write_to_sqlite(
+    df: pd.DataFrame,
+    sqlite_path: str,
+    table_name: str,
+    primary_key: Optional[Sequence[str]] = None,
+) -> None:
     """
     Writes the DataFrame to a SQLite database.
     Creates the database file if it does not exist.
     Replaces the table if it already exists.
+
+    If primary_key is given (e.g. ON_TIME_PRIMARY_KEY), the table is created
+    as a typed STRICT table WITHOUT ROWID, clustered on that key, and rows are
+    inserted presorted in key order. The drop, create and insert run in one
+    transaction, so a rejected write leaves the previous table in place.
+    Any checkpoint recorded for the table by a chunked load is discarded.
+    Raises sqlite3.IntegrityError on duplicate keys or mistyped values.
     """
     conn = sqlite3.connect(sqlite_path)
-    df.to_sql(table_name, conn, if_exists="replace", index=False)
-    conn.close()
+    try:
+        if primary_key is None:
+            df.to_sql(table_name, conn, if_exists="replace", index=False)
+            _clear_checkpoint(conn, table_name)
+            conn.commit()
+        else:
+            primary_key = list(primary_key)
+            conn.isolation_level = None
+            conn.execute("BEGIN")
+            try:
+                conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+                conn.execute(build_strict_table_sql(df, table_name, primary_key))
+                df = df.sort_values(primary_key, kind="stable")
+                _insert_rows(conn, df, table_name)
+                _clear_checkpoint(conn, table_name)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    finally:
+        conn.close()
 
 
 # -------------------------------------------------------------------------
@@ -75,3 +183,420 @@ def verify_row_count(sqlite_path: str, table_name: str) -> int:
     conn.close()
     return count
 
+
+# -------------------------------------------------------------------------
+# Fingerprint a source file
+# -------------------------------------------------------------------------
+def file_fingerprint(path: str) -> str:
+    """
+    Returns a fingerprint of the file built from its size, its modification
+    time and a SHA-256 of its first and last FINGERPRINT_BYTES bytes.
+    Cheap enough for very large inputs while still telling a checkpoint
+    apart from a different or re-released source file.
+
+    It does not detect a same-size edit in the middle of the file that also
+    keeps the original modification time (e.g. a copy with preserved
+    timestamps).
+    """
+    stat = os.stat(path)
+    digest = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if stat.st_size > FINGERPRINT_BYTES:
+            f.seek(max(FINGERPRINT_BYTES, stat.st_size - FINGERPRINT_BYTES))
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+# -------------------------------------------------------------------------
+# Read / write load checkpoints
+# -------------------------------------------------------------------------
+def _checkpoint_table_exists(conn: sqlite3.Connection) -> bool:
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (CHECKPOINT_TABLE,),
+        ).fetchone()
+        is not None
+    )
+
+
+def _ensure_checkpoint_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            byte_offset INTEGER NOT NULL,
+            rows_committed INTEGER NOT NULL,
+            dtypes TEXT NOT NULL
+        )"""
+    )
+
+
+def read_checkpoint(conn: sqlite3.Connection, table_name: str) -> Optional[tuple]:
+    """
+    Returns (fingerprint, byte_offset, rows_committed, dtypes) for the table,
+    or None if no checkpoint has been recorded. dtypes maps each raw CSV
+    column to the pandas dtype the load parses it as.
+    Does not write to the database.
+    """
+    if not _checkpoint_table_exists(conn):
+        return None
+    row = conn.execute(
+        f"SELECT fingerprint, byte_offset, rows_committed, dtypes "
+        f"FROM {CHECKPOINT_TABLE} WHERE table_name = ?",
+        (table_name,),
+    ).fetchone()
+    if row is None:
+        return None
+    return row[0], row[1], row[2], json.loads(row[3])
+
+
+def _write_checkpoint(
+    conn: sqlite3.Connection,
+    table_name: str,
+    fingerprint: str,
+    byte_offset: int,
+    rows_committed: int,
+    dtypes: dict,
+) -> None:
+    conn.execute(
+        f"INSERT OR REPLACE INTO {CHECKPOINT_TABLE} "
+        "(table_name, fingerprint, byte_offset, rows_committed, dtypes) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (table_name, fingerprint, byte_offset, rows_committed, json.dumps(dtypes)),
+    )
+
+
+def _clear_checkpoint(conn: sqlite3.Connection, table_name: str) -> None:
+    """Deletes the table's checkpoint, if the checkpoint table exists."""
+    if _checkpoint_table_exists(conn):
+        conn.execute(
+            f"DELETE FROM {CHECKPOINT_TABLE} WHERE table_name = ?", (table_name,)
+        )
+
+
+# -------------------------------------------------------------------------
+# Read a CSV in chunks starting from a byte offset
+# -------------------------------------------------------------------------
+def _iter_csv_chunks(
+    path: str, byte_offset: int, chunk_size: int
+) -> Iterator[tuple[bytes, int, int]]:
+    """
+    Yields (csv_bytes, record_count, end_offset) for successive chunks of
+    chunk_size records, each prefixed with the header line, starting at
+    byte_offset (0 means just after the header line).
+
+    A record ends at a newline outside double quotes, so quoted fields may
+    span lines. Blank lines between records are skipped.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        if byte_offset:
+            f.seek(byte_offset)
+
+        records = []
+        record = b""
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            if not record and not line.strip():
+                continue
+            record += line
+            # An odd number of quotes means a quoted field is still open
+            if record.count(b'"') % 2:
+                continue
+            records.append(record)
+            record = b""
+            if len(records) == chunk_size:
+                yield header + b"".join(records), len(records), f.tell()
+                records = []
+
+        if record:
+            raise ValueError(f"Unterminated quoted field at end of {path}")
+        if records:
+            yield header + b"".join(records), len(records), f.tell()
+
+
+# -------------------------------------------------------------------------
+# Work out column types for the whole file
+# -------------------------------------------------------------------------
+def _column_kind(series: pd.Series) -> str:
+    if series.isna().all():
+        return "empty"
+    if pd.api.types.is_bool_dtype(series):
+        return "bool"
+    if pd.api.types.is_integer_dtype(series):
+        return "int"
+    if pd.api.types.is_float_dtype(series):
+        return "float"
+    return "text"
+
+
+def infer_csv_dtypes(csv_path: str, chunk_size: int) -> dict:
+    """
+    Returns {raw column name: pandas dtype} for the whole CSV, reading it
+    chunk_size rows at a time. The result matches what read_csv infers when
+    loading the file in one go, so chunked and unchunked loads declare the
+    same table. Empty values turn integer columns into float and boolean
+    columns into text, as they do for read_csv.
+    """
+    header_columns = list(pd.read_csv(csv_path, nrows=0).columns)
+    kinds = {col: set() for col in header_columns}
+    has_rows = False
+
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        has_rows = has_rows or len(chunk) > 0
+        for col in header_columns:
+            kinds[col].add(_column_kind(chunk[col]))
+            if chunk[col].isna().any():
+                kinds[col].add("empty")
+
+    dtypes = {}
+    for col, seen in kinds.items():
+        values = seen - {"empty"}
+        if not has_rows or "text" in values:
+            dtypes[col] = "string"
+        elif "bool" in values:
+            dtypes[col] = "bool" if seen == {"bool"} else "string"
+        elif values == {"int"}:
+            dtypes[col] = "int64"
+        else:
+            dtypes[col] = "float64"
+    return dtypes
+
+
+# -------------------------------------------------------------------------
+# Commit one chunk together with its checkpoint
+# -------------------------------------------------------------------------
+def _commit_chunk(
+    conn: sqlite3.Connection,
+    df: pd.DataFrame,
+    table_name: str,
+    primary_key: Optional[Sequence[str]],
+    create_table: bool,
+    fingerprint: str,
+    byte_offset: int,
+    rows_committed: int,
+    dtypes: dict,
+) -> None:
+    """
+    Inserts the chunk and records the checkpoint in a single transaction,
+    (re)creating the table first when create_table is set.
+    """
+    conn.execute("BEGIN")
+    try:
+        if create_table:
+            conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+            if primary_key is None:
+                conn.execute(pd.io.sql.get_schema(df, table_name))
+            else:
+                conn.execute(build_strict_table_sql(df, table_name, primary_key))
+        if primary_key is not None:
+            df = df.sort_values(primary_key, kind="stable")
+
+        _insert_rows(conn, df, table_name)
+        _write_checkpoint(
+            conn, table_name, fingerprint, byte_offset, rows_committed, dtypes
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+# -------------------------------------------------------------------------
+# Checkpointed, resumable chunked load
+# -------------------------------------------------------------------------
+def load_csv_checkpointed(
+    csv_path: str,
+    sqlite_path: str,
+    table_name: str,
+    chunk_size: int,
+    primary_key: Optional[Sequence[str]] = None,
+) -> dict:
+    """
+    Loads the CSV into SQLite in chunks of chunk_size rows.
+
+    Each chunk is inserted and the checkpoint (source fingerprint, byte
+    offset, rows committed) is updated in the same transaction, so a run
+    killed partway through resumes from the last committed chunk. A
+    checkpoint for a different source file is discarded and the table is
+    rebuilt from scratch. Once the file is fully loaded, rerunning is a
+    no-op.
+
+    On a fresh load the column types are inferred for the whole file first
+    (see infer_csv_dtypes) and stored with the checkpoint, so the table is
+    declared exactly as an unchunked load would declare it and every chunk,
+    including after a resume, is parsed into those types.
+    Raises ValueError if a chunk does not parse into the expected records.
+
+    Returns the starting byte offset and the totals from the checkpoint.
+    """
+    fingerprint = file_fingerprint(csv_path)
+    file_size = os.path.getsize(csv_path)
+    if primary_key is not None:
+        primary_key = list(primary_key)
+
+    conn = sqlite3.connect(sqlite_path, isolation_level=None)
+
+    try:
+        _ensure_checkpoint_table(conn)
+        checkpoint = read_checkpoint(conn, table_name)
+        create_table = checkpoint is None or checkpoint[0] != fingerprint
+        if create_table:
+            byte_offset, rows_committed = 0, 0
+            dtypes = infer_csv_dtypes(csv_path, chunk_size)
+        else:
+            _, byte_offset, rows_committed, dtypes = checkpoint
+        resumed_from = byte_offset
+
+        chunks = _iter_csv_chunks(csv_path, byte_offset, chunk_size)
+        for data, record_count, end_offset in chunks:
+            df = clean_column_names(pd.read_csv(io.BytesIO(data), dtype=dtypes))
+            if len(df) != record_count:
+                raise ValueError(
+                    f"Chunk ending at byte {end_offset} of {csv_path} parsed "
+                    f"into {len(df)} rows, expected {record_count}"
+                )
+
+            _commit_chunk(
+                conn,
+                df,
+                table_name,
+                primary_key,
+                create_table,
+                fingerprint,
+                end_offset,
+                rows_committed + len(df),
+                dtypes,
+            )
+
+            create_table = False
+            byte_offset = end_offset
+            rows_committed += len(df)
+
+        # Header-only files and trailing blank lines still need the table
+        # and a checkpoint that covers the whole file.
+        if create_table or byte_offset != file_size:
+            empty = {col: pd.Series(dtype=dtype) for col, dtype in dtypes.items()}
+            df = clean_column_names(pd.DataFrame(empty))
+            _commit_chunk(
+                conn,
+                df,
+                table_name,
+                primary_key,
+                create_table,
+                fingerprint,
+                file_size,
+                rows_committed,
+                dtypes,
+            )
+            byte_offset = file_size
+
+        return {
+            "resumed_from": resumed_from,
+            "byte_offset": byte_offset,
+            "rows_committed": rows_committed,
+        }
+
+    finally:
+        conn.close()
+
+
+# -------------------------------------------------------------------------
+# Verify a checkpointed load completed exactly once
+# -------------------------------------------------------------------------
+def verify_checkpointed_load(csv_path: str, sqlite_path: str, table_name: str) -> int:
+    """
+    Confirms the checkpoint matches the source file, covers it to the last
+    byte, and agrees with the table row count. Returns the row count.
+    Raises RuntimeError if the load is incomplete or was applied twice.
+    """
+    conn = sqlite3.connect(sqlite_path)
+    try:
+        checkpoint = read_checkpoint(conn, table_name)
+    finally:
+        conn.close()
+
+    if checkpoint is None or checkpoint[0] != file_fingerprint(csv_path):
+        raise RuntimeError(f"No checkpoint for {csv_path} in {table_name}")
+
+    _, byte_offset, rows_committed, _ = checkpoint
+    if byte_offset != os.path.getsize(csv_path):
+        raise RuntimeError(
+            f"Load incomplete: {byte_offset} of {os.path.getsize(csv_path)} bytes"
+        )
+
+    row_count = verify_row_count(sqlite_path, table_name)
+    if row_count != rows_committed:
+        raise RuntimeError(
+            f"{table_name} has {row_count} rows, checkpoint recorded {rows_committed}"
+        )
+    return row_count
+
+
+# -------------------------------------------------------------------------
+# Full ETL runner
+# -------------------------------------------------------------------------
+def run_etl(
+    csv_path: str,
+    sqlite_path: str,
+    table_name: str,
+    chunk_size: Optional[int] = None,
+    primary_key: Optional[Sequence[str]] = None,
+    reload_on_mismatch: bool = False,
+) -> dict:
+    """
+    Runs the full pipeline: check the file, load, clean, write, verify.
+
+    Without chunk_size the whole CSV is loaded in memory and the table is
+    replaced. With chunk_size the load is checkpointed and resumable (see
+    load_csv_checkpointed) and verified as exactly-once at the end.
+
+    If verification fails, RuntimeError is raised. With reload_on_mismatch
+    the checkpoint is discarded instead and the file reloaded once from
+    scratch, which the result reports as "reloaded": True.
+    Raises FileNotFoundError if the CSV does not exist.
+    """
+    if not file_exists(csv_path):
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+
+    if chunk_size is None:
+        df = clean_column_names(load_csv(csv_path))
+        write_to_sqlite(df, sqlite_path, table_name, primary_key)
+        return {
+            "rows_loaded": len(df),
+            "rows_in_db": verify_row_count(sqlite_path, table_name),
+            "table_name": table_name,
+        }
+
+    result = load_csv_checkpointed(
+        csv_path, sqlite_path, table_name, chunk_size, primary_key
+    )
+    reloaded = False
+    try:
+        rows_in_db = verify_checkpointed_load(csv_path, sqlite_path, table_name)
+    except RuntimeError:
+        if not reload_on_mismatch:
+            raise
+        conn = sqlite3.connect(sqlite_path)
+        try:
+            _clear_checkpoint(conn, table_name)
+            conn.commit()
+        finally:
+            conn.close()
+        result = load_csv_checkpointed(
+            csv_path, sqlite_path, table_name, chunk_size, primary_key
+        )
+        rows_in_db = verify_checkpointed_load(csv_path, sqlite_path, table_name)
+        reloaded = True
+
+    return {
+        "rows_loaded": result["rows_committed"],
+        "rows_in_db": rows_in_db,
+        "table_name": table_name,
+        "resumed_from": result["resumed_from"],
+        "reloaded": reloaded,
+    }
@@ -9,6 +9,13 @@ from capstone_v2_etl_pipeline import (
     clean_column_names,
     write_to_sqlite,
     verify_row_count,
+    build_strict_table_sql,
+    ON_TIME_PRIMARY_KEY,
+    read_checkpoint,
+    run_etl,
+    file_fingerprint,
+    verify_checkpointed_load,
+    _insert_rows,
 )
 
 
@@ -72,6 +79,87 @@ def test_write_to_sqlite_and_row_count(tmp_path):
     assert count == 2
 
 
+# -------------------------------------------------------------------------
+# Test STRICT / WITHOUT ROWID layout keyed on the natural key
+# -------------------------------------------------------------------------
+def _on_time_frame():
+    return pd.DataFrame(
+        {
+            "year": [2024, 2023, 2023],
+            "month": [1, 12, 11],
+            "carrier": ["DL", "DL", "AA"],
+            "airport": ["ATL", "ATL", "JFK"],
+            "arr_flights": [100.0, None, 50.0],
+        }
+    )
+
+
+def test_write_to_sqlite_strict_layout(tmp_path):
+    sqlite_path = tmp_path / "strict.db"
+    table_name = "On_Time_Performance"
+
+    write_to_sqlite(_on_time_frame(), sqlite_path, table_name, ON_TIME_PRIMARY_KEY)
+
+    conn = sqlite3.connect(sqlite_path)
+    ddl = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE name = ?", (table_name,)
+    ).fetchone()[0]
+    rows = conn.execute(f"SELECT year, month, carrier FROM {table_name}").fetchall()
+    conn.close()
+
+    assert "STRICT" in ddl
+    assert "WITHOUT ROWID" in ddl
+    assert rows == [(2023, 11, "AA"), (2023, 12, "DL"), (2024, 1, "DL")]
+    assert verify_row_count(sqlite_path, table_name) == 3
+
+
+def test_write_to_sqlite_strict_rejects_duplicate_key(tmp_path):
+    df = pd.concat([_on_time_frame(), _on_time_frame().head(1)])
+
+    with pytest.raises(sqlite3.IntegrityError):
+        write_to_sqlite(df, tmp_path / "dup.db", "T", ON_TIME_PRIMARY_KEY)
+
+
+def test_write_to_sqlite_strict_rejects_mistyped_value(tmp_path):
+    df = _on_time_frame()
+    df["carrier_name"] = pd.Series(["Delta", 1.5, b"\x00"], dtype=object)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        write_to_sqlite(df, tmp_path / "strict.db", "T", ON_TIME_PRIMARY_KEY)
+
+
+def test_write_to_sqlite_strict_keeps_table_on_rejected_write(tmp_path):
+    sqlite_path = tmp_path / "strict.db"
+    write_to_sqlite(_on_time_frame(), sqlite_path, "T", ON_TIME_PRIMARY_KEY)
+
+    df = pd.concat([_on_time_frame(), _on_time_frame().head(1)])
+    with pytest.raises(sqlite3.IntegrityError):
+        write_to_sqlite(df, sqlite_path, "T", ON_TIME_PRIMARY_KEY)
+
+    assert verify_row_count(sqlite_path, "T") == 3
+
+
+def test_write_to_sqlite_strict_datetime_column(tmp_path):
+    sqlite_path = tmp_path / "strict.db"
+    df = _on_time_frame()
+    df["loaded_at"] = pd.to_datetime(["2024-01-31", "2023-12-31", None])
+
+    write_to_sqlite(df, sqlite_path, "T", ON_TIME_PRIMARY_KEY)
+
+    conn = sqlite3.connect(sqlite_path)
+    rows = conn.execute("SELECT loaded_at FROM T").fetchall()
+    conn.close()
+
+    assert rows == [(None,), ("2023-12-31T00:00:00",), ("2024-01-31T00:00:00",)]
+
+
+def test_build_strict_table_sql_missing_key_column():
+    df = pd.DataFrame({"year": [2024]})
+
+    with pytest.raises(KeyError):
+        build_strict_table_sql(df, "T", ON_TIME_PRIMARY_KEY)
+
+
 # -------------------------------------------------------------------------
 # Test verify_row_count on missing table
 # -------------------------------------------------------------------------
@@ -84,3 +172,249 @@ def test_verify_row_count_missing_table(tmp_path):
 
     with pytest.raises(sqlite3.OperationalError):
         verify_row_count(sqlite_path, "MissingTable")
+
+
+# -------------------------------------------------------------------------
+# Test checkpointed, resumable loads through run_etl
+# -------------------------------------------------------------------------
+def _write_on_time_csv(path, rows):
+    lines = ["year,month,carrier,airport,arr_flights"]
+    lines += [f"2023,{m},DL,ATL,{m * 10}" for m in range(1, rows + 1)]
+    path.write_text("\n".join(lines) + "\n")
+
+
+def test_run_etl_chunked_load(tmp_path):
+    csv_file = tmp_path / "delays.csv"
+    sqlite_path = tmp_path / "etl.db"
+    _write_on_time_csv(csv_file, 5)
+
+    result = run_etl(csv_file, sqlite_path, "On_Time_Performance", chunk_size=2)
+
+    assert result["rows_loaded"] == 5
+    assert result["rows_in_db"] == 5
+    assert result["resumed_from"] == 0
+
+    # Rerunning a completed load does not insert anything twice
+    result = run_etl(csv_file, sqlite_path, "On_Time_Performance", chunk_size=2)
+    assert result["rows_in_db"] == 5
+    assert result["resumed_from"] == os.path.getsize(csv_file)
+
+
+def test_run_etl_resumes_from_checkpoint(tmp_path, monkeypatch):
+    csv_file = tmp_path / "delays.csv"
+    sqlite_path = tmp_path / "etl.db"
+    _write_on_time_csv(csv_file, 5)
+
+    calls = []
+
+    def crash_on_second_chunk(conn, df, table_name):
+        calls.append(len(df))
+        if len(calls) == 2:
+            raise MemoryError("simulated crash")
+        _insert_rows(conn, df, table_name)
+
+    monkeypatch.setattr(
+        "capstone_v2_etl_pipeline._insert_rows", crash_on_second_chunk
+    )
+    with pytest.raises(MemoryError):
+        run_etl(
+            csv_file, sqlite_path, "T", chunk_size=2, primary_key=ON_TIME_PRIMARY_KEY
+        )
+
+    conn = sqlite3.connect(sqlite_path)
+    _, byte_offset, rows_committed, _ = read_checkpoint(conn, "T")
+    conn.close()
+    assert rows_committed == 2
+    assert verify_row_count(sqlite_path, "T") == 2
+
+    monkeypatch.setattr("capstone_v2_etl_pipeline._insert_rows", _insert_rows)
+    result = run_etl(
+        csv_file, sqlite_path, "T", chunk_size=2, primary_key=ON_TIME_PRIMARY_KEY
+    )
+
+    assert result["resumed_from"] == byte_offset
+    assert result["rows_loaded"] == 5
+    assert result["rows_in_db"] == 5
+
+
+def test_run_etl_restarts_for_new_source_file(tmp_path):
+    csv_file = tmp_path / "delays.csv"
+    sqlite_path = tmp_path / "etl.db"
+    _write_on_time_csv(csv_file, 5)
+    run_etl(csv_file, sqlite_path, "T", chunk_size=2)
+
+    _write_on_time_csv(csv_file, 3)
+    result = run_etl(csv_file, sqlite_path, "T", chunk_size=2)
+
+    assert result["resumed_from"] == 0
+    assert result["rows_in_db"] == 3
+
+
+def test_run_etl_skips_blank_lines(tmp_path):
+    csv_file = tmp_path / "delays.csv"
+    sqlite_path = tmp_path / "etl.db"
+    csv_file.write_text(
+        "year,month,carrier,airport,arr_flights\n"
+        "2023,1,DL,ATL,10\n"
+        "\n"
+        "2023,2,DL,ATL,20\n"
+        "2023,3,DL,ATL,30\n"
+        "\n"
+    )
+
+    for chunk_size in (1, 2, 3):
+        result = run_etl(csv_file, sqlite_path, f"T{chunk_size}", chunk_size)
+        assert result["rows_in_db"] == 3
+
+
+def test_run_etl_header_only_file(tmp_path):
+    csv_file = tmp_path / "delays.csv"
+    sqlite_path = tmp_path / "etl.db"
+    csv_file.write_text("year,month,carrier,airport,arr_flights\n")
+
+    result = run_etl(
+        csv_file, sqlite_path, "T", chunk_size=2, primary_key=ON_TIME_PRIMARY_KEY
+    )
+
+    assert result["rows_in_db"] == 0
+    assert run_etl(csv_file, sqlite_path, "T", chunk_size=2)["rows_in_db"] == 0
+
+
+def test_run_etl_strict_types_stable_across_chunks(tmp_path):
+    csv_file = tmp_path / "delays.csv"
+    sqlite_path = tmp_path / "etl.db"
+    csv_file.write_text(
+        "year,month,carrier,airport,arr_flights,carrier_name\n"
+        "2023,1,DL,ATL,1,\n"
+        "2023,2,DL,ATL,2.5,Delta Air Lines Inc.\n"
+    )
+
+    result = run_etl(
+        csv_file, sqlite_path, "T", chunk_size=1, primary_key=ON_TIME_PRIMARY_KEY
+    )
+
+    conn = sqlite3.connect(sqlite_path)
+    rows = conn.execute("SELECT month, arr_flights, carrier_name FROM T").fetchall()
+    conn.close()
+
+    assert result["rows_in_db"] == 2
+    assert rows == [(1, 1.0, None), (2, 2.5, "Delta Air Lines Inc.")]
+
+
+def test_run_etl_full_load_discards_checkpoint(tmp_path):
+    file_a = tmp_path / "a.csv"
+    file_b = tmp_path / "b.csv"
+    sqlite_path = tmp_path / "etl.db"
+    _write_on_time_csv(file_a, 2)
+    _write_on_time_csv(file_b, 1)
+
+    run_etl(file_a, sqlite_path, "T", chunk_size=1)
+    run_etl(file_b, sqlite_path, "T")
+    result = run_etl(file_a, sqlite_path, "T", chunk_size=1)
+
+    assert result["resumed_from"] == 0
+    assert result["rows_in_db"] == 2
+
+
+def test_run_etl_verification_mismatch(tmp_path):
+    csv_file = tmp_path / "delays.csv"
+    sqlite_path = tmp_path / "etl.db"
+    _write_on_time_csv(csv_file, 5)
+    run_etl(csv_file, sqlite_path, "T", chunk_size=2)
+
+    conn = sqlite3.connect(sqlite_path)
+    conn.execute("DELETE FROM T WHERE month = 1")
+    conn.commit()
+    conn.close()
+
+    with pytest.raises(RuntimeError):
+        run_etl(csv_file, sqlite_path, "T", chunk_size=2)
+
+    result = run_etl(csv_file, sqlite_path, "T", chunk_size=2, reload_on_mismatch=True)
+
+    assert result["reloaded"] is True
+    assert result["resumed_from"] == 0
+    assert result["rows_in_db"] == 5
+
+
+def test_run_etl_chunked_schema_matches_unchunked(tmp_path):
+    csv_file = tmp_path / "delays.csv"
+    sqlite_path = tmp_path / "etl.db"
+    csv_file.write_text(
+        "year,month,carrier,airport,arr_flights,arr_delay,diverted\n"
+        "2023,1,9,ATL,10,,True\n"
+        "2023,2,9E,ATL,20,1282.00,False\n"
+        "2023,3,DL,ATL,30,5,False\n"
+    )
+
+    run_etl(csv_file, sqlite_path, "Full", primary_key=ON_TIME_PRIMARY_KEY)
+    run_etl(
+        csv_file, sqlite_path, "Chunked", chunk_size=1, primary_key=ON_TIME_PRIMARY_KEY
+    )
+
+    conn = sqlite3.connect(sqlite_path)
+    ddl = dict(conn.execute("SELECT name, sql FROM sqlite_master").fetchall())
+    full = conn.execute(
+        "SELECT carrier, typeof(arr_delay), arr_delay, diverted FROM Full"
+    ).fetchall()
+    chunked = conn.execute(
+        "SELECT carrier, typeof(arr_delay), arr_delay, diverted FROM Chunked"
+    ).fetchall()
+    conn.close()
+
+    assert ddl["Chunked"] == ddl["Full"].replace('"Full"', '"Chunked"')
+    assert chunked == full
+    assert chunked[1] == ("9E", "real", 1282.0, 0)
+
+
+def test_run_etl_quoted_newline(tmp_path):
+    csv_file = tmp_path / "delays.csv"
+    sqlite_path = tmp_path / "etl.db"
+    csv_file.write_text(
+        "year,month,carrier,airport,airport_name\n"
+        '2023,1,DL,ATL,"Atlanta, GA:\nHartsfield-Jackson"\n'
+        '2023,2,DL,ATL,"Atlanta, GA: Hartsfield-Jackson"\n'
+    )
+
+    result = run_etl(csv_file, sqlite_path, "T", chunk_size=1)
+
+    conn = sqlite3.connect(sqlite_path)
+    names = conn.execute("SELECT airport_name FROM T").fetchall()
+    conn.close()
+
+    assert result["rows_in_db"] == 2
+    assert names[0] == ("Atlanta, GA:\nHartsfield-Jackson",)
+
+
+def test_verify_checkpointed_load_does_not_write(tmp_path):
+    csv_file = tmp_path / "delays.csv"
+    sqlite_path = tmp_path / "empty.db"
+    _write_on_time_csv(csv_file, 1)
+    sqlite3.connect(sqlite_path).close()
+
+    with pytest.raises(RuntimeError):
+        verify_checkpointed_load(csv_file, sqlite_path, "T")
+
+    conn = sqlite3.connect(sqlite_path)
+    tables = conn.execute("SELECT name FROM sqlite_master").fetchall()
+    conn.close()
+    assert tables == []
+
+
+def test_file_fingerprint_detects_tail_edit(tmp_path):
+    original = tmp_path / "original.csv"
+    edited = tmp_path / "edited.csv"
+    body = "a,b\n" + "1,18.00\n" * 200_000
+    original.write_text(body)
+    edited.write_text(body[:-6] + "19.00\n")
+
+    stat = os.stat(original)
+    os.utime(edited, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert os.path.getsize(original) == os.path.getsize(edited)
+    assert file_fingerprint(original) != file_fingerprint(edited)
+
+
+def test_run_etl_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        run_etl(tmp_path / "missing.csv", tmp_path / "etl.db", "T")